@@ -2,17 +2,207 @@
 SSO Service for PBL Integration
 Handles both Mock and Real SSO modes.
 """
+import hashlib
 import logging
+import time
+import orjson
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 from core.models import User
 
 logger = logging.getLogger(__name__)
 
+# SSO settings are process constants; resolve them once at import.
+_SSO_MODE = settings.SSO_MODE
+_PBL_API_URL = (settings.PBL_API_URL or '').rstrip('/')
+_PBL_API_KEY = settings.PBL_API_KEY
+# Partner spec requires `x-api-key`. Shared across calls: do not mutate.
+_PBL_HEADERS: Dict[str, str] = {'x-api-key': _PBL_API_KEY} if _PBL_API_KEY else {}
+_PBL_SSO_VERIFY_PATH = getattr(settings, 'PBL_SSO_VERIFY_PATH', '/auth/verify')
+if not _PBL_SSO_VERIFY_PATH.startswith('/'):
+    _PBL_SSO_VERIFY_PATH = f"/{_PBL_SSO_VERIFY_PATH}"
+_PBL_SSO_VERIFY_URL = f"{_PBL_API_URL}{_PBL_SSO_VERIFY_PATH}"
+
+# Shared HTTP session so PBL verify calls reuse pooled keep-alive connections
+# instead of paying a fresh TCP/TLS handshake per login.
+_SESSION = requests.Session()
+_SESSION.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=2,
+            # Never retry a read timeout: each one already cost the full read
+            # timeout, and a worker would stay blocked for several of them.
+            read=0,
+            backoff_factor=0.1,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+# Partner payload key aliases, in priority order.
+_ROLL_KEYS = (
+    'universityRollNumber',
+    'university_roll_number',
+    'universityRollNo',
+    'university_roll_no',
+    'rollNumber',
+    'roll_number',
+    'universityRoll',
+)
+_SUBJECT_KEYS = ('subject', 'selectedSubject', 'currentSubject', 'subjectName')
+_TEACHER_ID_KEYS = (
+    'teacherId',
+    'teacher_id',
+    'teacherExternalId',
+    'mentorId',
+    'mentor_id',
+    'evaluatorId',
+    'evaluator_id',
+    'evaluatorExternalId',
+    'facultyId',
+)
+_TEACHER_EMAIL_KEYS = (
+    'teacherEmail',
+    'teacher_email',
+    'mentorEmail',
+    'mentor_email',
+    'evaluatorEmail',
+    'evaluator_email',
+)
+_ITEM_SUBJECT_KEYS = ('subject', 'subjectName', 'name', 'title')
+_ITEM_TEACHER_ID_KEYS = (
+    'teacher_external_id',
+    'teacherExternalId',
+    'teacherId',
+    'mentorId',
+    'mentor_id',
+    'evaluatorExternalId',
+    'evaluatorId',
+    'evaluator_id',
+    'facultyId',
+)
+# Key paths into a nested teacher/mentor/evaluator object on an assignment item.
+_ITEM_TEACHER_OBJ_ID_PATHS = tuple(
+    (obj_key, id_key) for obj_key in ('teacher', 'mentor', 'evaluator') for id_key in ('id', 'userId')
+)
+_ITEM_TEACHER_OBJ_EMAIL_PATHS = tuple((obj_key, 'email') for obj_key in ('teacher', 'mentor', 'evaluator'))
+_ASSIGNMENT_LIST_KEYS = (
+    'assignments',
+    'subjects',
+    'courses',
+    'modules',
+    'studentSubjects',
+    'teacherAssignments',
+)
+# Any of these keys must be present for a payload to carry assignment data.
+_ASSIGNMENT_KEYS = frozenset(_SUBJECT_KEYS + _ASSIGNMENT_LIST_KEYS)
+
+# Role normalization: explicit faculty flags, then raw role -> internal role.
+_FACULTY_FLAGS = ('is_faculty', 'isFaculty', 'is_teacher', 'isTeacher', 'is_mentor', 'isMentor')
+_ROLE_MAP = {
+    'faculty': 'faculty',
+    'teacher': 'faculty',
+    'mentor': 'faculty',
+    'staff': 'faculty',
+    'student': 'student',
+    'learner': 'student',
+    'user': 'student',
+}
+_INTERNAL_ROLES = frozenset(('student', 'faculty'))
+
+# User data returned for the simplified `mock_student` / `mock_faculty` tokens.
+_MOCK_DEFAULTS = {
+    role: {
+        'pbl_user_id': f'mock_{role}_001',
+        'university_roll_number': f'mock_{role}_roll_001' if role == 'student' else None,
+        'email': f'mock.{role}@example.com',
+        'name': f'Mock {role.title()}',
+        'role': role,
+    }
+    for role in ('student', 'faculty')
+}
+
+
+def _norm(v: Any) -> Optional[str]:
+    """Strip a scalar payload value; return None when it is missing or blank."""
+    if v is None:
+        return None
+    s = (v if type(v) is str else str(v)).strip()
+    return s or None
+
+
+def _first(d: Dict[str, Any], keys: tuple) -> Any:
+    """Return the first truthy value among `keys` in `d`, else None."""
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return v
+    return None
+
+
+def _resolve(d: Dict[str, Any], paths: tuple) -> Any:
+    """Return the first truthy value found at any of the key `paths` in `d`, else None."""
+    for path in paths:
+        cur: Any = d
+        for k in path:
+            cur = cur.get(k) if isinstance(cur, dict) else None
+            if cur is None:
+                break
+        if cur:
+            return cur
+    return None
+
+
+def _verify_cache_key(sso_token: str, prefix: str = 'sso:verify') -> str:
+    """Cache key for an SSO token verify result (hashed; never store the raw token)."""
+    digest = hashlib.blake2b(sso_token.encode(), digest_size=16).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def _faculty_pbl_ids_by_email(emails: set) -> Dict[str, str]:
+    """Map lowercased faculty emails to their PBL user ids with a single query."""
+    if not emails:
+        return {}
+    return dict(
+        User.objects.filter(role='faculty')
+        .annotate(email_lower=Lower('email'))
+        # `> ''` excludes both NULL and empty ids in one predicate.
+        .filter(email_lower__in=emails, pbl_user_id__gt='')
+        .order_by('created_at')
+        .values_list('email_lower', 'pbl_user_id')
+    )
+
+
+def _verify_cache_ttl(data: Dict[str, Any]) -> int:
+    """TTL for a verified token: SSO_VERIFY_CACHE_TTL, capped by the token's own expiry.
+
+    Partners may send `exp` (epoch seconds) or `expires_in` (seconds).
+    """
+    ttl = int(getattr(settings, 'SSO_VERIFY_CACHE_TTL', 300))
+    try:
+        expires_in = data.get('expires_in')
+        if expires_in is not None:
+            ttl = min(ttl, int(expires_in))
+        exp = data.get('exp')
+        if exp is not None:
+            ttl = min(ttl, int(exp) - int(time.time()))
+    except (TypeError, ValueError):
+        pass
+    return ttl
+
 
 class SSOService:
     """
@@ -20,10 +210,12 @@ class SSOService:
     Supports both Mock mode (development) and Real mode (production).
     """
     
-    def __init__(self):
-        self.mode = settings.SSO_MODE
-        self.pbl_api_url = settings.PBL_API_URL
-        self.pbl_api_key = settings.PBL_API_KEY
+    def __init__(self, session: Optional[requests.Session] = None):
+        # HTTP session is injectable (e.g. for tests); defaults to the shared pool.
+        self.session = session or _SESSION
+        if _SSO_MODE != 'mock':
+            # Useful in production debugging; does not include token.
+            logger.info('PBL SSO verify endpoint: %s', _PBL_SSO_VERIFY_URL)
     
     def verify_token(self, sso_token: str) -> Optional[Dict[str, Any]]:
         """
@@ -35,7 +227,7 @@ class SSOService:
         Returns:
             User data dict or None if verification fails
         """
-        if self.mode == 'mock':
+        if _SSO_MODE == 'mock':
             return self._mock_verify(sso_token)
         else:
             return self._real_verify(sso_token)
@@ -49,31 +241,12 @@ class SSOService:
         raw_role = (raw_user.get('role') or raw_user.get('type') or '').strip().lower()
 
         # Explicit faculty/mentor flags take priority.
-        for key in ('is_faculty', 'isFaculty', 'is_teacher', 'isTeacher', 'is_mentor', 'isMentor'):
-            val = raw_user.get(key)
-            if val is True:
-                return 'faculty'
-
-        if raw_role in {'faculty', 'teacher', 'mentor', 'staff'}:
+        if any(raw_user.get(key) is True for key in _FACULTY_FLAGS):
             return 'faculty'
-        if raw_role in {'student', 'learner', 'user'}:
-            return 'student'
-        if not raw_role:
-            # If role missing, default safely to student.
-            return 'student'
 
-        return None
-
-    def _pbl_headers(self) -> Dict[str, str]:
-        """Return headers for PBL API requests.
+        # If role missing, default safely to student.
+        return _ROLE_MAP.get(raw_role, None if raw_role else 'student')
 
-        Partner spec requires `x-api-key`.
-        """
-        headers: Dict[str, str] = {}
-        if self.pbl_api_key:
-            headers['x-api-key'] = self.pbl_api_key
-        return headers
-    
     def _mock_verify(self, sso_token: str) -> Optional[Dict[str, Any]]:
         """
         Mock SSO verification for development.
@@ -83,42 +256,32 @@ class SSOService:
         
         Or simplified: mock_student or mock_faculty (uses defaults)
         """
-        if not sso_token.startswith('mock_'):
+        prefix, sep, rest = sso_token.partition('_')
+        if prefix != 'mock' or not sep:
             logger.warning(f"Invalid mock token format: {sso_token}")
             return None
         
-        parts = sso_token.split('_', 4)
-        
-        if len(parts) == 2:
+        if '_' not in rest:
             # Simplified mock token: mock_student or mock_faculty
-            _, role = parts
-            if role not in ['student', 'faculty']:
-                return None
-            
-            return {
-                'pbl_user_id': f'mock_{role}_001',
-                'university_roll_number': f'mock_{role}_roll_001' if role == 'student' else None,
-                'email': f'mock.{role}@example.com',
-                'name': f'Mock {role.title()}',
-                'role': role
-            }
+            defaults = _MOCK_DEFAULTS.get(rest)
+            return dict(defaults) if defaults else None
         
-        elif len(parts) >= 5:
-            # Full mock token: mock_role_id_email_name
-            _, role, user_id, email, name = parts[0], parts[1], parts[2], parts[3], '_'.join(parts[4:])
-            
-            if role not in ['student', 'faculty']:
-                return None
-            
-            return {
-                'pbl_user_id': user_id,
-                'university_roll_number': f'mock_student_roll_{user_id}' if role == 'student' else None,
-                'email': email,
-                'name': name,
-                'role': role
-            }
+        # Full mock token: mock_role_id_email_name
+        fields = rest.split('_', 3)
+        if len(fields) < 4:
+            return None
+        role, user_id, email, name = fields
         
-        return None
+        if role not in _INTERNAL_ROLES:
+            return None
+        
+        return {
+            'pbl_user_id': user_id,
+            'university_roll_number': f'mock_student_roll_{user_id}' if role == 'student' else None,
+            'email': email,
+            'name': name,
+            'role': role
+        }
     
     def _real_verify(self, sso_token: str) -> Optional[Dict[str, Any]]:
         """
@@ -134,24 +297,30 @@ class SSOService:
             }
         }
         """
+        cache_enabled = getattr(settings, 'SSO_VERIFY_CACHE_ENABLED', True)
+        cache_key = _verify_cache_key(sso_token)
+        neg_cache_key = _verify_cache_key(sso_token, 'sso:verify_neg')
+        if cache_enabled:
+            cached = cache.get_many([cache_key, neg_cache_key])
+            if isinstance(cached.get(cache_key), dict):
+                return cached[cache_key]
+            if cached.get(neg_cache_key):
+                # Recently rejected by PBL; don't replay the outbound call.
+                return None
+
         try:
-            if not self.pbl_api_url or not self.pbl_api_key:
+            if not _PBL_API_URL or not _PBL_API_KEY:
                 logger.error('PBL_API_URL / PBL_API_KEY not configured for real SSO mode')
                 return None
 
-            base = self.pbl_api_url.rstrip('/')
-            verify_path = getattr(settings, 'PBL_SSO_VERIFY_PATH', '/auth/verify')
-            if not verify_path.startswith('/'):
-                verify_path = f"/{verify_path}"
-
-            # Useful in production debugging; does not include token.
-            logger.info('PBL SSO verify call: %s%s', base, verify_path)
+            logger.debug('PBL SSO verify call: %s', _PBL_SSO_VERIFY_URL)
 
-            response = requests.get(
-                f"{base}{verify_path}",
-                params={'token': sso_token},
-                headers=self._pbl_headers(),
-                timeout=10,
+            # PBL's verify contract is GET ?token=...; build the query string directly
+            # instead of having requests re-encode a params dict per call.
+            response = self.session.get(
+                f"{_PBL_SSO_VERIFY_URL}?token={quote(sso_token, safe='')}",
+                headers=_PBL_HEADERS,
+                timeout=(3.05, 10),
             )
             
             if response.status_code != 200:
@@ -171,12 +340,18 @@ class SSOService:
                         response.status_code,
                         body_preview,
                     )
+                # Only a rejected token (400) is negative-cached; 401/403 mean our
+                # credentials are wrong and 5xx/timeouts are transient.
+                if cache_enabled and response.status_code == 400:
+                    cache.set(neg_cache_key, True, getattr(settings, 'SSO_VERIFY_NEG_TTL', 30))
                 return None
             
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if not data.get('valid'):
                 logger.warning('PBL SSO verification returned invalid')
+                if cache_enabled and data.get('valid') is False:
+                    cache.set(neg_cache_key, True, getattr(settings, 'SSO_VERIFY_NEG_TTL', 30))
                 return None
 
             user_data = data.get('user')
@@ -198,7 +373,7 @@ class SSOService:
                 return None
 
             role = self._normalize_role(user_data)
-            if role not in {'student', 'faculty'}:
+            if role not in _INTERNAL_ROLES:
                 logger.warning('Invalid role from PBL: %s', user_data.get('role'))
                 return None
 
@@ -206,41 +381,29 @@ class SSOService:
             name = user_data.get('name') or email.split('@')[0]
 
             # Optional external field: university roll number
-            roll = (
-                user_data.get('universityRollNumber')
-                or user_data.get('university_roll_number')
-                or user_data.get('universityRollNo')
-                or user_data.get('university_roll_no')
-                or user_data.get('rollNumber')
-                or user_data.get('roll_number')
-                or user_data.get('universityRoll')
-            )
-            roll_s = str(roll).strip() if roll is not None else ''
+            roll_s = _norm(_first(user_data, _ROLL_KEYS))
 
             # Some partners keep student-only fields at top level; try full payload too.
             if not roll_s and isinstance(data, dict):
-                roll2 = (
-                    data.get('universityRollNumber')
-                    or data.get('university_roll_number')
-                    or data.get('universityRollNo')
-                    or data.get('university_roll_no')
-                    or data.get('rollNumber')
-                    or data.get('roll_number')
-                    or data.get('universityRoll')
-                )
-                roll_s = str(roll2).strip() if roll2 is not None else ''
+                roll_s = _norm(_first(data, _ROLL_KEYS))
 
-            return {
+            result = {
                 'pbl_user_id': str(user_data['id']),
                 'email': email,
+                'email_norm': email.lower(),
                 'name': name,
                 'role': role,
-                'university_roll_number': roll_s or None,
+                'university_roll_number': roll_s,
                 # Keep raw payload so we can extract optional assignment info
                 # (subject/mentor mappings) during user creation.
                 'raw_user': user_data,
                 'raw': data,
             }
+            if cache_enabled:
+                ttl = _verify_cache_ttl(data)
+                if ttl > 0:
+                    cache.set(cache_key, result, ttl)
+            return result
             
         except requests.RequestException as e:
             logger.error(f"Error calling PBL API: {e}")
@@ -270,10 +433,17 @@ class SSOService:
         if isinstance(nested_user, dict):
             payloads.append(nested_user)
 
+        # Most partners never send assignment data; skip the full scan then.
+        if not any(p.keys() & _ASSIGNMENT_KEYS for p in payloads):
+            return 0
+
         from core.assignment_models import StudentTeacherAssignment
+        from core.pbl_external import invalidate_student_profile
         from core.subjects import is_allowed_subject, normalize_subject
 
         found_pairs: set[tuple[str, str]] = set()
+        # subject -> teacher external id; last mapping seen for a subject wins.
+        pending: Dict[str, str] = {}
 
         def norm_subject(value: Any) -> Optional[str]:
             s = normalize_subject(str(value)) if value is not None else ''
@@ -281,79 +451,30 @@ class SSOService:
                 return None
             return s if is_allowed_subject(s) else None
 
-        def norm_email(value: Any) -> Optional[str]:
-            s = (str(value).strip() if value is not None else '')
-            return s or None
-
-        def norm_id(value: Any) -> Optional[str]:
-            s = (str(value).strip() if value is not None else '')
-            return s or None
-
-        def resolve_teacher_external_id(teacher_id: Any, teacher_email: Any) -> Optional[str]:
-            tid = norm_id(teacher_id)
-            if tid:
-                return tid
-
-            email = norm_email(teacher_email)
-            if not email:
-                return None
-
-            # If we only have email, map to local faculty user to obtain PBL id.
-            teacher = (
-                User.objects.filter(role='faculty', email__iexact=email)
-                .exclude(pbl_user_id__isnull=True)
-                .exclude(pbl_user_id__exact='')
-                .only('pbl_user_id')
-                .first()
-            )
-            # If the faculty user doesn't exist locally yet, still persist the mapping
-            # using the email as a stable identifier. Downstream slot filtering
-            # understands both PBL user IDs and emails.
-            return teacher.pbl_user_id if teacher else email
+        # (subject, teacher_id, teacher_email) as found in the payload. Email-only
+        # mappings are resolved to PBL ids with one batched lookup afterwards.
+        raw_pairs: List[Tuple[str, Optional[str], Optional[str]]] = []
 
         def upsert(subject: Any, teacher_id: Any = None, teacher_email: Any = None) -> None:
             subj = norm_subject(subject)
             if not subj:
                 return
-            ext_id = resolve_teacher_external_id(teacher_id, teacher_email)
-            if not ext_id:
+            tid = _norm(teacher_id)
+            email = None if tid else _norm(teacher_email)
+            if not tid and not email:
                 return
-            StudentTeacherAssignment.create_or_update_assignment(student, ext_id, subj)
-            found_pairs.add((subj, ext_id))
+            raw_pairs.append((subj, tid, email))
 
         for p in payloads:
             # 1) If payload contains a selected subject + mentor info
             upsert(
-                p.get('subject')
-                or p.get('selectedSubject')
-                or p.get('currentSubject')
-                or p.get('subjectName'),
-                p.get('teacherId')
-                or p.get('teacher_id')
-                or p.get('teacherExternalId')
-                or p.get('mentorId')
-                or p.get('mentor_id')
-                or p.get('evaluatorId')
-                or p.get('evaluator_id')
-                or p.get('evaluatorExternalId')
-                or p.get('facultyId'),
-                p.get('teacherEmail')
-                or p.get('teacher_email')
-                or p.get('mentorEmail')
-                or p.get('mentor_email')
-                or p.get('evaluatorEmail')
-                or p.get('evaluator_email'),
+                _first(p, _SUBJECT_KEYS),
+                _first(p, _TEACHER_ID_KEYS),
+                _first(p, _TEACHER_EMAIL_KEYS),
             )
 
             # 2) Parse lists of subject assignments if present
-            for list_key in (
-                'assignments',
-                'subjects',
-                'courses',
-                'modules',
-                'studentSubjects',
-                'teacherAssignments',
-            ):
+            for list_key in _ASSIGNMENT_LIST_KEYS:
                 items = p.get(list_key)
                 if not isinstance(items, list):
                     continue
@@ -362,51 +483,51 @@ class SSOService:
                     if not isinstance(item, dict):
                         continue
 
-                    subject = (
-                        item.get('subject')
-                        or item.get('subjectName')
-                        or item.get('name')
-                        or item.get('title')
+                    upsert(
+                        _first(item, _ITEM_SUBJECT_KEYS),
+                        _first(item, _ITEM_TEACHER_ID_KEYS) or _resolve(item, _ITEM_TEACHER_OBJ_ID_PATHS),
+                        _first(item, _TEACHER_EMAIL_KEYS) or _resolve(item, _ITEM_TEACHER_OBJ_EMAIL_PATHS),
                     )
 
-                    teacher_id = (
-                        item.get('teacher_external_id')
-                        or item.get('teacherExternalId')
-                        or item.get('teacherId')
-                        or item.get('mentorId')
-                        or item.get('mentor_id')
-                        or item.get('evaluatorExternalId')
-                        or item.get('evaluatorId')
-                        or item.get('evaluator_id')
-                        or item.get('facultyId')
-                    )
-                    teacher_email = (
-                        item.get('teacherEmail')
-                        or item.get('teacher_email')
-                        or item.get('mentorEmail')
-                        or item.get('mentor_email')
-                        or item.get('evaluatorEmail')
-                        or item.get('evaluator_email')
-                    )
+        # If we only have email, map to local faculty users to obtain PBL ids.
+        email_to_pbl = _faculty_pbl_ids_by_email({email.lower() for (_, tid, email) in raw_pairs if not tid})
 
-                    teacher_obj = item.get('teacher') or item.get('mentor') or item.get('evaluator')
-                    if isinstance(teacher_obj, dict):
-                        teacher_id = teacher_id or teacher_obj.get('id') or teacher_obj.get('userId')
-                        teacher_email = teacher_email or teacher_obj.get('email')
+        for subj, tid, email in raw_pairs:
+            # If the faculty user doesn't exist locally yet, still persist the mapping
+            # using the email as a stable identifier. Downstream slot filtering
+            # understands both PBL user IDs and emails.
+            ext_id = tid or email_to_pbl.get(email.lower(), email)
+            pending[subj] = ext_id
+            found_pairs.add((subj, ext_id))
 
-                    upsert(subject, teacher_id, teacher_email)
+        if pending:
+            # One bulk upsert instead of a SELECT + UPDATE/INSERT per subject.
+            with transaction.atomic():
+                StudentTeacherAssignment.objects.bulk_create(
+                    [
+                        StudentTeacherAssignment(student=student, subject=subj, teacher_external_id=ext_id)
+                        for subj, ext_id in pending.items()
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['student', 'subject'],
+                    update_fields=['teacher_external_id', 'updated_at'],
+                )
 
                 # If the partner payload appears to contain a full snapshot (2+ subjects),
                 # prune any local assignments that are no longer present.
-                subjects_found = {s for (s, _) in found_pairs}
-                if len(subjects_found) >= 2:
-                    StudentTeacherAssignment.objects.filter(student=student).exclude(subject__in=subjects_found).delete()
+                if len(pending) >= 2:
+                    StudentTeacherAssignment.objects.filter(student=student).exclude(subject__in=list(pending)).delete()
+
+            # Mentor lists derived from assignments must not outlive this write.
+            invalidate_student_profile(student.email)
 
-            return len(found_pairs)
+        return len(found_pairs)
 
-    def _cache_last_sso_payload_debug(self, email: str, raw_payload: Any) -> None:
-        """Cache a safe summary of the last SSO verify payload for debugging."""
-        email_norm = (email or '').strip().lower()
+    def _cache_last_sso_payload_debug(self, email_norm: str, raw_payload: Any) -> None:
+        """Cache a safe summary of the last SSO verify payload for debugging.
+
+        `email_norm` must already be stripped and lowercased.
+        """
         if not email_norm or not isinstance(raw_payload, dict):
             return
 
@@ -456,7 +577,7 @@ class SSOService:
         """
         try:
             from core.assignment_models import StudentTeacherAssignment
-            from core.pbl_external import get_student_external_profile
+            from core.pbl_external import get_student_external_profile, invalidate_student_profile
             from core.subjects import is_allowed_subject, normalize_subject
 
             profile = get_student_external_profile(student.email) or {}
@@ -464,9 +585,8 @@ class SSOService:
             if not isinstance(by_subject, dict) or not by_subject:
                 return 0
 
-            upserts = 0
-            subjects_seen: set[str] = set()
-
+            # Prefer first email; partner is expected to provide exactly one evaluator per subject.
+            subject_emails: Dict[str, str] = {}
             for subject_key, emails in by_subject.items():
                 subject = normalize_subject(str(subject_key))
                 if not subject or not is_allowed_subject(subject):
@@ -474,25 +594,24 @@ class SSOService:
                 if not isinstance(emails, list) or not emails:
                     continue
 
-                # Prefer first email; partner is expected to provide exactly one evaluator per subject.
                 email = next((str(e).strip() for e in emails if e and str(e).strip()), '')
                 if not email:
                     continue
+                subject_emails[subject] = email
 
-                teacher = (
-                    User.objects.filter(role='faculty', email__iexact=email)
-                    .exclude(pbl_user_id__isnull=True)
-                    .exclude(pbl_user_id__exact='')
-                    .only('pbl_user_id')
-                    .first()
-                )
-                identifier = teacher.pbl_user_id if teacher else email
+            email_to_pbl = _faculty_pbl_ids_by_email({e.lower() for e in subject_emails.values()})
+
+            upserts = 0
+            subjects_seen: set[str] = set()
+            for subject, email in subject_emails.items():
+                identifier = email_to_pbl.get(email.lower(), email)
                 StudentTeacherAssignment.create_or_update_assignment(student, identifier, subject)
                 upserts += 1
                 subjects_seen.add(subject)
 
             if len(subjects_seen) >= 2:
                 StudentTeacherAssignment.objects.filter(student=student).exclude(subject__in=subjects_seen).delete()
+                invalidate_student_profile(student.email)
 
             return upserts
         except Exception:
@@ -509,21 +628,35 @@ class SSOService:
         Returns:
             User instance
         """
-        user, created = User.objects.update_or_create(
-            email=user_data['email'],
-            defaults={
-                'name': user_data['name'],
-                'role': user_data['role'],
-                'pbl_user_id': user_data['pbl_user_id'],
-                'university_roll_number': user_data.get('university_roll_number'),
-                'is_active': True
-            }
-        )
-        
+        fields = {
+            'name': user_data['name'],
+            'role': user_data['role'],
+            'pbl_user_id': user_data['pbl_user_id'],
+            'university_roll_number': user_data.get('university_roll_number'),
+            'is_active': True
+        }
+        created = False
+        try:
+            user = User.objects.get(email=user_data['email'])
+        except User.DoesNotExist:
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(email=user_data['email'], **fields)
+                created = True
+            except IntegrityError:
+                # Lost a race with a concurrent first login for the same email.
+                user = User.objects.get(email=user_data['email'])
+
         if created:
             logger.info(f"Created new user: {user.email} ({user.role})")
         else:
-            logger.info(f"Updated existing user: {user.email}")
+            # Read-first: only write when something actually changed.
+            changed = [f for f, v in fields.items() if getattr(user, f) != v]
+            if changed:
+                for f in changed:
+                    setattr(user, f, fields[f])
+                user.save(update_fields=changed + ['updated_at'])
+                logger.info(f"Updated existing user: {user.email}")
 
         # Optional: sync student subject assignments if the SSO payload includes them.
         # Never fail login due to assignment parsing.
@@ -532,7 +665,7 @@ class SSOService:
             # that may exist outside the nested user object.
             raw_payload = user_data.get('raw') or user_data.get('raw_user')
             try:
-                self._cache_last_sso_payload_debug(user.email, raw_payload)
+                self._cache_last_sso_payload_debug(user_data.get('email_norm') or user.email.lower(), raw_payload)
                 n = self._sync_student_assignments(user, raw_payload)
                 if n == 0:
                     self._sync_student_assignments_from_external_profile(user)
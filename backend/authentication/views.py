@@ -18,6 +18,46 @@ from core.serializers import UserSerializer
 
 logger = logging.getLogger(__name__)
 
+# Frontend SSO callback URLs are process constants; build them once.
+_STUDENT_CALLBACK_URL = f"{settings.STUDENT_FRONTEND_URL}/auth/callback"
+_FACULTY_CALLBACK_URL = f"{settings.FACULTY_FRONTEND_URL}/auth/callback"
+
+
+def _frontend_url(role: str) -> str:
+    return settings.STUDENT_FRONTEND_URL if role == 'student' else settings.FACULTY_FRONTEND_URL
+
+
+def _query_token(query_params, keys):
+    """Return the first non-empty SSO token among the given query param names."""
+    return next(filter(None, (query_params.get(k) for k in keys)), None)
+
+
+def _authenticate_sso(sso_token, *, view_name, action='login', error_key='error'):
+    """Verify an SSO token, create/update the local user and issue JWTs.
+
+    Shared by all SSO views. Returns (user, tokens, None) on success or
+    (None, None, error_response) on failure.
+    """
+    user_data = sso_service.verify_token(sso_token)
+    if not user_data:
+        return None, None, Response(
+            {error_key: 'Invalid or expired SSO token'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    # Get or create user + generate JWT (may raise DB errors)
+    try:
+        user = sso_service.get_or_create_user(user_data)
+        tokens = sso_service.generate_tokens(user)
+    except DatabaseError as exc:
+        logger.exception('%s DB error during %s: %s', view_name, action, exc)
+        return None, None, Response(
+            {error_key: f'Service unavailable. Database error during SSO {action}.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    return user, tokens, None
+
 
 class SSOEntryView(APIView):
     """
@@ -34,11 +74,7 @@ class SSOEntryView(APIView):
     
     def get(self, request):
         """Handle SSO redirect from PBL."""
-        sso_token = (
-            request.query_params.get('token')
-            or request.query_params.get('sso_token')
-            or request.query_params.get('ssoToken')
-        )
+        sso_token = _query_token(request.query_params, ('token', 'sso_token', 'ssoToken'))
         
         if not sso_token:
             return Response(
@@ -46,43 +82,23 @@ class SSOEntryView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verify token
-        user_data = sso_service.verify_token(sso_token)
-        
-        if not user_data:
-            return Response(
-                {'error': 'Invalid or expired SSO token'},
-                status=status.HTTP_401_UNAUTHORIZED
-            )
-        
-        # Get or create user + generate JWT (may raise DB errors)
-        try:
-            user = sso_service.get_or_create_user(user_data)
-            tokens = sso_service.generate_tokens(user)
-        except DatabaseError as exc:
-            logger.exception('SSOEntryView DB error during login: %s', exc)
-            return Response(
-                {'error': 'Service unavailable. Database error during SSO login.'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
+        user, tokens, error = _authenticate_sso(sso_token, view_name='SSOEntryView')
+        if error is not None:
+            return error
 
         # Audit log (safe): do NOT log tokens.
         logger.info('SSOEntryView login success user_id=%s email=%s role=%s', user.id, user.email, user.role)
         
         # Determine redirect URL based on role
-        if user.role == 'student':
-            frontend_url = settings.STUDENT_FRONTEND_URL
-        else:
-            frontend_url = settings.FACULTY_FRONTEND_URL
+        callback_url = _STUDENT_CALLBACK_URL if user.role == 'student' else _FACULTY_CALLBACK_URL
         
         # Build redirect URL with tokens
         params = urlencode({
             'access': tokens['access'],
             'refresh': tokens['refresh']
         })
-        redirect_url = f"{frontend_url}/auth/callback?{params}"
         
-        return HttpResponseRedirect(redirect_url)
+        return HttpResponseRedirect(f"{callback_url}?{params}")
 
 
 class SSOVerifyView(APIView):
@@ -99,39 +115,17 @@ class SSOVerifyView(APIView):
         
         sso_token = serializer.validated_data['token']
         
-        # Verify token
-        user_data = sso_service.verify_token(sso_token)
-        
-        if not user_data:
-            return Response(
-                {'error': 'Invalid or expired SSO token'},
-                status=status.HTTP_401_UNAUTHORIZED
-            )
-        
-        # Get or create user + generate JWT (may raise DB errors)
-        try:
-            user = sso_service.get_or_create_user(user_data)
-            tokens = sso_service.generate_tokens(user)
-        except DatabaseError as exc:
-            logger.exception('SSOVerifyView DB error during verify: %s', exc)
-            return Response(
-                {'error': 'Service unavailable. Database error during SSO verify.'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
+        user, tokens, error = _authenticate_sso(sso_token, view_name='SSOVerifyView', action='verify')
+        if error is not None:
+            return error
 
         logger.info('SSOVerifyView success user_id=%s email=%s role=%s', user.id, user.email, user.role)
         
-        # Determine redirect URL
-        if user.role == 'student':
-            redirect_url = settings.STUDENT_FRONTEND_URL
-        else:
-            redirect_url = settings.FACULTY_FRONTEND_URL
-        
         return Response({
             'access': tokens['access'],
             'refresh': tokens['refresh'],
             'user': UserSerializer(user).data,
-            'redirect_url': redirect_url
+            'redirect_url': _frontend_url(user.role)
         })
 
 
@@ -147,27 +141,12 @@ class SSOLoginView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        sso_token = (
-            request.query_params.get('sso_token')
-            or request.query_params.get('token')
-            or request.query_params.get('ssoToken')
-        )
+        sso_token = _query_token(request.query_params, ('sso_token', 'token', 'ssoToken'))
         if not sso_token:
             return Response({'detail': 'Missing SSO token'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user_data = sso_service.verify_token(sso_token)
-        if not user_data:
-            return Response({'detail': 'Invalid or expired SSO token'}, status=status.HTTP_401_UNAUTHORIZED)
-
         try:
-            user = sso_service.get_or_create_user(user_data)
-            tokens = sso_service.generate_tokens(user)
-        except DatabaseError as exc:
-            logger.exception('SSOLoginView DB error during login: %s', exc)
-            return Response(
-                {'detail': 'Service unavailable. Database error during SSO login.'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
+            user, tokens, error = _authenticate_sso(sso_token, view_name='SSOLoginView', error_key='detail')
         except Exception as exc:
             # Catch-all: this endpoint is often the first hit in production; make failures debuggable.
             logger.exception('SSOLoginView unexpected error: %s', exc)
@@ -175,13 +154,15 @@ class SSOLoginView(APIView):
                 {'detail': 'Unexpected error during SSO login.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+        if error is not None:
+            return error
 
         logger.info('SSOLoginView login success user_id=%s email=%s role=%s', user.id, user.email, user.role)
         return Response({
             'access': tokens['access'],
             'refresh': tokens['refresh'],
             'user': UserSerializer(user).data,
-            'redirect_url': settings.STUDENT_FRONTEND_URL if user.role == 'student' else settings.FACULTY_FRONTEND_URL,
+            'redirect_url': _frontend_url(user.role),
         }, status=status.HTTP_200_OK)
 
 
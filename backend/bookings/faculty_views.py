@@ -40,7 +40,7 @@ class FacultyMarkAbsentView(APIView):
     @transaction.atomic
     def patch(self, request, booking_id):
         try:
-            booking = Booking.objects.select_related('slot', 'slot__faculty', 'student').get(pk=booking_id)
+            booking = BookingSerializer.setup_eager_loading(Booking.objects).get(pk=booking_id)
         except Booking.DoesNotExist:
             return Response({'detail': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -69,7 +69,7 @@ class FacultyMarkCompletedView(APIView):
     @transaction.atomic
     def patch(self, request, booking_id):
         try:
-            booking = Booking.objects.select_related('slot', 'slot__faculty', 'student').get(pk=booking_id)
+            booking = BookingSerializer.setup_eager_loading(Booking.objects).get(pk=booking_id)
         except Booking.DoesNotExist:
             return Response({'detail': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -97,7 +97,7 @@ class FacultyCancelBookingView(APIView):
         serializer.is_valid(raise_exception=True)
 
         try:
-            booking = Booking.objects.select_related('slot', 'slot__faculty', 'student').get(pk=booking_id)
+            booking = BookingSerializer.setup_eager_loading(Booking.objects).get(pk=booking_id)
         except Booking.DoesNotExist:
             return Response({'detail': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -129,24 +129,33 @@ class FacultyAbsentStudentsView(APIView):
 
         # Deduplicate by (student, subject) and keep latest
         latest = {}
-        for booking in qs:
+        for booking in qs.iterator(chunk_size=500):
             subject = normalize_subject(booking.slot.subject)
             key = (booking.student_id, subject)
             if key not in latest:
                 latest[key] = booking
 
+        # One query for this faculty's permissions instead of one per student.
+        permission_updated_at = {}
+        if latest:
+            permission_updated_at = {
+                (student_id, subject): updated_at
+                for student_id, subject, updated_at in RebookingPermission.objects
+                .filter(
+                    teacher_external_id=request.user.pbl_user_id,
+                    student_id__in={student_id for student_id, _ in latest},
+                )
+                .values_list('student_id', 'subject', 'updated_at')
+            }
+
         results = []
         for booking in latest.values():
             subject = normalize_subject(booking.slot.subject)
             absent_time = booking.absent_at or booking.updated_at
 
-            permission = RebookingPermission.objects.filter(
-                student=booking.student,
-                subject=subject,
-                teacher_external_id=request.user.pbl_user_id,
-            ).only('updated_at').first()
+            perm_updated = permission_updated_at.get((booking.student_id, subject))
 
-            resolved = permission is not None and (absent_time and permission.updated_at >= absent_time)
+            resolved = perm_updated is not None and (absent_time and perm_updated >= absent_time)
             if resolved:
                 # Keep the list focused on unresolved absences.
                 continue
@@ -179,7 +188,7 @@ class FacultyAllowRebookingForBookingView(APIView):
     @transaction.atomic
     def post(self, request, booking_id):
         try:
-            booking = Booking.objects.select_related('slot', 'slot__faculty', 'student').get(pk=booking_id)
+            booking = BookingSerializer.setup_eager_loading(Booking.objects).get(pk=booking_id)
         except Booking.DoesNotExist:
             return Response({'detail': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
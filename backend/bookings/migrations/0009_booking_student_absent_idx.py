@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-15 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_remove_booking_group_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'absent')), fields=['student', '-absent_at', '-updated_at'], name='bk_student_absent_idx'),
+        ),
+    ]
@@ -3,10 +3,12 @@ Booking Models - Appointments between students and faculty
 """
 import uuid
 from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from core.subjects import normalize_subject
 
 
@@ -27,6 +29,9 @@ class Booking(models.Model):
     STUDENT_CANCELLATION_WINDOW_MESSAGE = (
         'Cancellation is not allowed within 4 hours of the scheduled slot.'
     )
+
+    # Same-day booking cutoff: after this hour only later days can be booked
+    SAME_DAY_BOOKING_CUTOFF_HOUR = 19
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -70,6 +75,12 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['student', 'status']),
             models.Index(fields=['status', 'created_at']),
+            # Absence-block / blocked-subjects lookups: latest ABSENT rows per student
+            models.Index(
+                fields=['student', '-absent_at', '-updated_at'],
+                name='bk_student_absent_idx',
+                condition=Q(status='absent'),
+            ),
         ]
         constraints = []
     
@@ -91,7 +102,7 @@ class Booking(models.Model):
         """Build the queryset used to detect conflicting bookings.
 
         scope:
-          - 'same_day': conflicts are limited to slot__start_time__date == slot_date
+          - 'same_day': conflicts are limited to slots starting on slot_date
           - 'future': conflicts are any slot__start_time__gt now
 
         Conflicting statuses are consistent across code paths: CONFIRMED and ABSENT.
@@ -116,7 +127,12 @@ class Booking(models.Model):
         if scope == 'same_day':
             if slot_date is None:
                 raise ValueError('slot_date is required for same_day conflict checks')
-            return qs.filter(slot__start_time__date=slot_date)
+            # Half-open range instead of __date so the start_time index is usable.
+            day_start = timezone.make_aware(datetime.combine(slot_date, time.min))
+            return qs.filter(
+                slot__start_time__gte=day_start,
+                slot__start_time__lt=day_start + timedelta(days=1),
+            )
 
         if scope == 'future':
             return qs.filter(slot__start_time__gt=now)
@@ -148,66 +164,98 @@ class Booking(models.Model):
             exclude_pk=exclude_pk,
         ).exists():
             raise ValidationError(message)
+
+    @classmethod
+    def is_blocked_by_absence(
+        cls,
+        *,
+        student,
+        subject: str,
+        teacher_external_id,
+        for_update: bool = False,
+    ) -> bool:
+        """Return True if an absence for this subject/teacher has not been cleared.
+
+        A student stays blocked while any ABSENT booking is newer than their
+        RebookingPermission (or no permission exists). Evaluated in a single
+        EXISTS query instead of loading the absent row and the permission.
+        """
+
+        permission_updated_at = RebookingPermission.objects.filter(
+            student=OuterRef('student'),
+            subject=subject,
+            teacher_external_id=teacher_external_id,
+        ).values('updated_at')[:1]
+
+        qs = cls.objects
+        if for_update:
+            qs = qs.select_for_update()
+
+        return (
+            qs.filter(
+                student=student,
+                status=cls.Status.ABSENT,
+                slot__subject=subject,
+                slot__faculty__pbl_user_id=teacher_external_id,
+            )
+            .annotate(permission_updated_at=Subquery(permission_updated_at))
+            .filter(
+                Q(permission_updated_at__isnull=True)
+                | Q(permission_updated_at__lt=Coalesce(F('absent_at'), F('updated_at')))
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def _absence_block_message(subject: str) -> str:
+        return (
+            f'Booking for {subject} is blocked because you were marked absent. '
+            'Your faculty must allow rebooking before you can book another slot.'
+        )
     
+    @classmethod
+    def earliest_bookable_date(cls, now):
+        """Return the first date that can still be booked at `now` (7pm cutoff)."""
+        today = now.date()
+        if now.hour >= cls.SAME_DAY_BOOKING_CUTOFF_HOUR:
+            return today + timedelta(days=1)
+        return today
+
     def clean(self):
         """Validate booking data."""
         if self.pk is None:  # Only on create
             subject = normalize_subject(self.slot.subject)
             teacher_external_id = self.slot.faculty.pbl_user_id
+            now = timezone.now()
 
             # Check if slot is available
             if not self.slot.is_available:
                 raise ValidationError({'slot': 'This slot is not available'})
 
             # Check if slot is in the future
-            if self.slot.start_time <= timezone.now():
+            if self.slot.start_time <= now:
                 raise ValidationError({'slot': 'Cannot book a slot in the past'})
 
             # Enforce 1 slot per subject per day (reset after 7pm)
             slot_date = self.slot.start_time.date()
-            now = timezone.now()
             # If after 7pm, allow booking for next day only
-            if now.hour >= 19:
-                if slot_date == now.date():
-                    raise ValidationError('You cannot book slots for today after 7pm. Please book for tomorrow.')
+            if slot_date < self.earliest_bookable_date(now):
+                raise ValidationError('You cannot book slots for today after 7pm. Please book for tomorrow.')
             # Only allow one booking per subject per day (CONFIRMED/ABSENT)
             Booking.validate_no_conflict(
                 student=self.student,
                 subject=subject,
                 scope='same_day',
                 slot_date=slot_date,
-                exclude_pk=self.pk,
                 message='You already have a booking for this subject on this day.',
             )
 
-            latest_absent = (
-                Booking.objects.filter(
-                    student=self.student,
-                    slot__subject=subject,
-                    slot__faculty__pbl_user_id=teacher_external_id,
-                    status=self.Status.ABSENT,
-                )
-                .order_by('-absent_at', '-updated_at')
-                .first()
-            )
-
-            if latest_absent is not None:
-                absent_time = latest_absent.absent_at or latest_absent.updated_at
-                permission = (
-                    RebookingPermission.objects.filter(
-                        student=self.student,
-                        subject=subject,
-                        teacher_external_id=teacher_external_id,
-                    )
-                    .only('updated_at')
-                    .first()
-                )
-
-                if permission is None or (absent_time and permission.updated_at < absent_time):
-                    raise ValidationError(
-                        f'Booking for {subject} is blocked because you were marked absent. '
-                        'Your faculty must allow rebooking before you can book another slot.'
-                    )
+            if Booking.is_blocked_by_absence(
+                student=self.student,
+                subject=subject,
+                teacher_external_id=teacher_external_id,
+            ):
+                raise ValidationError(self._absence_block_message(subject))
     
     @property
     def can_cancel(self):
@@ -241,11 +289,17 @@ class Booking(models.Model):
         from slots.models import Slot
         from core.models import User
         
-        # Lock the slot row
-        slot = Slot.objects.select_for_update().get(pk=slot.pk)
+        # Lock the slot row, fetching its faculty and any existing booking in the
+        # same query. of=('self',) keeps the lock off the outer-joined rows.
+        slot = (
+            Slot.objects.select_for_update(of=('self',))
+            .select_related('faculty', 'booking')
+            .get(pk=slot.pk)
+        )
 
-        # Lock the student row to reduce concurrent absence/permission races
-        User.objects.select_for_update().get(pk=student.pk)
+        # Lock the student row to reduce concurrent absence/permission races.
+        # Only the lock is needed, so don't load the user's columns.
+        User.objects.select_for_update().filter(pk=student.pk).values_list('pk', flat=True).get()
 
         subject = normalize_subject(slot.subject)
         teacher_external_id = slot.faculty.pbl_user_id
@@ -278,35 +332,13 @@ class Booking(models.Model):
         )
 
         # Absence lock is per-student (not per team). A student's absence should not block teammates.
-        latest_absent = (
-            cls.objects.select_for_update()
-            .filter(
-                student=student,
-                status=cls.Status.ABSENT,
-                slot__subject=subject,
-                slot__faculty__pbl_user_id=teacher_external_id,
-            )
-            .order_by('-absent_at', '-updated_at')
-            .first()
-        )
-
-        if latest_absent is not None:
-            absent_time = latest_absent.absent_at or latest_absent.updated_at
-            permission = (
-                RebookingPermission.objects.filter(
-                    student=student,
-                    subject=subject,
-                    teacher_external_id=teacher_external_id,
-                )
-                .only('updated_at')
-                .first()
-            )
-
-            if permission is None or (absent_time and permission.updated_at < absent_time):
-                raise ValidationError(
-                    f'Booking for {subject} is blocked because you were marked absent. '
-                    'Your faculty must allow rebooking before you can book another slot.'
-                )
+        if cls.is_blocked_by_absence(
+            student=student,
+            subject=subject,
+            teacher_external_id=teacher_external_id,
+            for_update=True,
+        ):
+            raise ValidationError(cls._absence_block_message(subject))
         
         # Reuse an existing cancelled booking row (allows rebooking the same slot)
         if existing_booking and existing_booking.status == cls.Status.CANCELLED:
@@ -332,9 +364,11 @@ class Booking(models.Model):
                 status=cls.Status.CONFIRMED
             )
         
-        # Mark slot as unavailable
+        # Mark slot as unavailable. A queryset update skips Slot.save()'s
+        # full_clean(), which would re-validate the whole slot.
+        Slot.objects.filter(pk=slot.pk).update(is_available=False, updated_at=now)
         slot.is_available = False
-        slot.save(update_fields=['is_available', 'updated_at'])
+        slot.updated_at = now
 
         return booking
     
@@ -357,8 +391,11 @@ class Booking(models.Model):
         self.save()
         
         # Make slot available again
+        from slots.models import Slot
+
+        Slot.objects.filter(pk=self.slot_id).update(is_available=True, updated_at=self.cancelled_at)
         self.slot.is_available = True
-        self.slot.save(update_fields=['is_available', 'updated_at'])
+        self.slot.updated_at = self.cancelled_at
         
         return self
 
@@ -1,6 +1,7 @@
 """
 Booking Serializers
 """
+
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import timedelta
@@ -8,7 +9,6 @@ from datetime import timedelta
 from .models import Booking
 from slots.serializers import SlotSerializer
 from core.serializers import UserMinimalSerializer
-from core.subjects import normalize_subject
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -28,6 +28,11 @@ class BookingSerializer(serializers.ModelSerializer):
     def get_student_university_roll_number(self, obj):
         student = getattr(obj, 'student', None)
         return getattr(student, 'university_roll_number', None)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join the relations this serializer reads (slot, slot.faculty, student)."""
+        return queryset.select_related('slot__faculty', 'student')
     
     class Meta:
         model = Booking
@@ -54,7 +59,7 @@ class BookingMinimalSerializer(serializers.ModelSerializer):
     def get_student_university_roll_number(self, obj):
         student = getattr(obj, 'student', None)
         return getattr(student, 'university_roll_number', None)
-    
+
     class Meta:
         model = Booking
         fields = ['id', 'student', 'student_id', 'student_university_roll_number', 'status', 'created_at']
@@ -71,7 +76,7 @@ class BookingCreateSerializer(serializers.Serializer):
         from slots.models import Slot
         
         try:
-            slot = Slot.objects.get(pk=value)
+            slot = Slot.objects.select_related('faculty', 'booking').get(pk=value)
         except Slot.DoesNotExist:
             raise serializers.ValidationError({'detail': 'Slot not found'})
         
@@ -81,10 +86,13 @@ class BookingCreateSerializer(serializers.Serializer):
         if slot.start_time <= timezone.now():
             raise serializers.ValidationError({'detail': 'Cannot book a slot in the past'})
         
-        # Check if already booked
-        if hasattr(slot, 'booking') and slot.booking.status == 'confirmed':
+        # Check if already booked (booking is joined above; None when the slot has none)
+        booking = getattr(slot, 'booking', None)
+        if booking is not None and booking.status == Booking.Status.CONFIRMED:
             raise serializers.ValidationError({'detail': 'This slot is already booked'})
         
+        # Reused by validate()/create() so the slot is only fetched once per request.
+        self._slot = slot
         return value
     
     def validate(self, data):
@@ -93,15 +101,17 @@ class BookingCreateSerializer(serializers.Serializer):
         1. Student must not have an existing active booking for the same subject on the same day (handled in model).
         2. Student can only book mentor slots (mentorEmails from external student profile)
         """
-        from slots.models import Slot
-        from core.pbl_external import get_student_external_profile
+        from core.pbl_external import (
+            get_student_external_profile_for_request,
+            get_student_mentor_emails_for_request,
+        )
 
-        student = self.context['request'].user
-        slot = Slot.objects.get(pk=data['slot_id'])
-        subject = normalize_subject(slot.subject)
+        request = self.context['request']
+        student = request.user
+        slot = self._slot
 
         # Mentor check (unchanged)
-        profile = get_student_external_profile(student.email)
+        profile = get_student_external_profile_for_request(request, student.email)
 
         # Lazy-fill: ensure we have the student's external ID stored.
         # This is required for faculty views to reliably display "Student ID".
@@ -151,12 +161,7 @@ class BookingCreateSerializer(serializers.Serializer):
         except Exception:
             pass
 
-        raw_mentor_emails = profile.get('mentor_emails') or []
-        mentor_emails = {
-            str(e).strip().lower()
-            for e in raw_mentor_emails
-            if e is not None and str(e).strip()
-        }
+        mentor_emails = get_student_mentor_emails_for_request(request, student.email)
         if not mentor_emails:
             raise serializers.ValidationError({
                 'detail': (
@@ -175,9 +180,7 @@ class BookingCreateSerializer(serializers.Serializer):
     
     def create(self, validated_data):
         """Create the booking using the model's transaction-safe method."""
-        from slots.models import Slot
-        
-        slot = Slot.objects.get(pk=validated_data['slot_id'])
+        slot = self._slot
         student = self.context['request'].user
 
         return Booking.create_booking(slot, student)
@@ -38,10 +38,12 @@ class StudentBookingViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return only the student's bookings for slots in the future."""
         from django.utils import timezone
-        return Booking.objects.filter(
-            student=self.request.user,
-            slot__start_time__gt=timezone.now()
-        ).select_related('slot', 'slot__faculty', 'student')
+        return BookingSerializer.setup_eager_loading(
+            Booking.objects.filter(
+                student=self.request.user,
+                slot__start_time__gt=timezone.now()
+            )
+        )
     
     def list(self, request):
         """List student's bookings."""
@@ -165,11 +167,20 @@ class StudentBookingViewSet(viewsets.ModelViewSet):
             Booking.objects
             .filter(student=student, status=Booking.Status.ABSENT)
             .select_related('slot', 'slot__faculty')
+            .only('id', 'absent_at', 'updated_at', 'slot__subject', 'slot__faculty__pbl_user_id')
             .order_by('-absent_at', '-updated_at')
         )
 
+        # One query for all of the student's permissions instead of one per absence.
+        permission_updated_at = {
+            (subject, teacher_external_id): updated_at
+            for subject, teacher_external_id, updated_at in RebookingPermission.objects
+            .filter(student=student)
+            .values_list('subject', 'teacher_external_id', 'updated_at')
+        }
+
         blocked_by_subject = {}
-        for b in absences:
+        for b in absences.iterator(chunk_size=500):
             subject = normalize_subject(b.slot.subject)
             teacher_external_id = getattr(b.slot.faculty, 'pbl_user_id', None)
             absent_time = b.absent_at or b.updated_at
@@ -178,13 +189,8 @@ class StudentBookingViewSet(viewsets.ModelViewSet):
                 # If we cannot identify the faculty externally, treat as blocked for safety.
                 unresolved = True
             else:
-                permission = (
-                    RebookingPermission.objects
-                    .filter(student=student, subject=subject, teacher_external_id=teacher_external_id)
-                    .only('updated_at')
-                    .first()
-                )
-                unresolved = permission is None or (absent_time and permission.updated_at < absent_time)
+                perm_updated = permission_updated_at.get((subject, teacher_external_id))
+                unresolved = perm_updated is None or (absent_time and perm_updated < absent_time)
 
             if not unresolved:
                 continue
@@ -216,10 +222,12 @@ class FacultyBookingViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Return bookings on faculty's slots for slots in the future."""
         from django.utils import timezone
-        return Booking.objects.filter(
-            slot__faculty=self.request.user,
-            slot__start_time__gt=timezone.now()
-        ).select_related('slot', 'slot__faculty', 'student')
+        return BookingSerializer.setup_eager_loading(
+            Booking.objects.filter(
+                slot__faculty=self.request.user,
+                slot__start_time__gt=timezone.now()
+            )
+        )
     
     def list(self, request):
         """List bookings on faculty's slots."""
@@ -1,19 +1,58 @@
 from django.apps import AppConfig
 
 
+# Arbitrary app-wide key for pg_try_advisory_lock.
+_RESET_JOB_LOCK_KEY = 7_190_001
+
+
+def _run_reset_job():
+    """Run reset_scheduling_data, at most one worker at a time.
+
+    Every gunicorn worker imports the app and schedules this job. On
+    Postgres a session advisory lock keeps the runs from overlapping:
+    workers that fire while another holds the lock skip the run. A worker
+    that fires after the lock is released still runs it again. That rerun
+    is harmless, because the command only deletes rows starting at or
+    before today 19:00, and slots can't be created in the past.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+
+    try:
+        if connection.vendor != 'postgresql':
+            call_command('reset_scheduling_data', '--yes')
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [_RESET_JOB_LOCK_KEY])
+            acquired = cursor.fetchone()[0]
+        if not acquired:
+            return
+
+        try:
+            call_command('reset_scheduling_data', '--yes')
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [_RESET_JOB_LOCK_KEY])
+    finally:
+        # The scheduler thread keeps its own connection; don't leave it idle all day.
+        connection.close()
+
+
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Core'
 
     def ready(self):
-        from apscheduler.schedulers.background import BackgroundScheduler
-        from django.core.management import call_command
-        import threading
+        from django.conf import settings
 
-        def reset_job():
-            call_command('reset_scheduling_data', '--yes')
+        if not getattr(settings, 'SCHEDULING_RESET_JOB_ENABLED', True):
+            return
+
+        from apscheduler.schedulers.background import BackgroundScheduler
 
-        scheduler = BackgroundScheduler()
-        scheduler.add_job(reset_job, 'cron', hour=19, minute=0)
-        threading.Thread(target=scheduler.start, daemon=True).start()
+        # BackgroundScheduler runs jobs on its own daemon thread.
+        scheduler = BackgroundScheduler(daemon=True)
+        scheduler.add_job(_run_reset_job, 'cron', hour=19, minute=0, coalesce=True, max_instances=1)
+        scheduler.start()
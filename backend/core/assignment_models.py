@@ -86,6 +86,9 @@ class StudentTeacherAssignment(models.Model):
         Create or update an assignment from SSO data.
         Called during SSO login when assignment data is received.
         """
+        # Local import: pbl_external imports this module at load time.
+        from core.pbl_external import invalidate_student_profile
+
         assignment, created = cls.objects.update_or_create(
             student=student,
             subject=subject,
@@ -93,4 +96,5 @@ class StudentTeacherAssignment(models.Model):
                 'teacher_external_id': teacher_external_id
             }
         )
+        invalidate_student_profile(student.email)
         return assignment, created
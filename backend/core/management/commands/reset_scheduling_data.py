@@ -32,15 +32,14 @@ class Command(BaseCommand):
             slots_to_delete = Slot.objects.filter(start_time__lte=today_7pm)
             bookings_to_delete = Booking.objects.filter(slot__start_time__lte=today_7pm)
 
-            bookings_count = bookings_to_delete.count()
-            slots_count = slots_to_delete.count()
-            assignments_count = StudentTeacherAssignment.objects.all().count()
-
-            bookings_to_delete.delete()
-            slots_to_delete.delete()
+            # delete() reports its own row counts; no separate COUNT(*) needed.
+            bookings_count, _ = bookings_to_delete.delete()
+            slots_count, _ = slots_to_delete.delete()
             # Optionally, preserve assignments (remove if you want to reset assignments too)
             # StudentTeacherAssignment.objects.all().delete()
 
+        assignments_count = StudentTeacherAssignment.objects.count()
+
         self.stdout.write(self.style.SUCCESS('Scheduling data reset complete.'))
         self.stdout.write(f'Deleted bookings: {bookings_count}')
         self.stdout.write(f'Deleted slots: {slots_count}')
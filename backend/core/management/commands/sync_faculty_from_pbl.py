@@ -91,35 +91,17 @@ class Command(BaseCommand):
 
         target_emails = set(by_email.keys())
 
-        created = 0
-        updated = 0
-
         self.stdout.write(
             f"PBL faculty fetched: {len(faculty)} | valid: {len(by_email)} | skipped: {skipped} | dry_run={dry_run}"
         )
 
-        def upsert_one(row: Dict[str, str]):
-            nonlocal created, updated
-            obj, was_created = User.objects.update_or_create(
-                email=row["email"],
-                defaults={
-                    "name": row["name"],
-                    "role": "faculty",
-                    "pbl_user_id": row["pbl_user_id"],
-                    "is_active": True,
-                },
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-            return obj
+        # Only membership matters here; iterator() skips the queryset result cache.
+        existing = set(User.objects.filter(email__in=target_emails).values_list("email", flat=True).iterator())
+        created = len(target_emails - existing)
+        updated = len(existing)
 
         if dry_run:
             # Estimate what would happen
-            existing = set(User.objects.filter(email__in=target_emails).values_list("email", flat=True))
-            created = len(target_emails - existing)
-            updated = len(existing)
             self.stdout.write(self.style.WARNING("Dry-run only; no DB writes."))
             self.stdout.write(f"Would create: {created}")
             self.stdout.write(f"Would update: {updated}")
@@ -129,8 +111,22 @@ class Command(BaseCommand):
             return
 
         with transaction.atomic():
-            for row in by_email.values():
-                upsert_one(row)
+            # Single INSERT ... ON CONFLICT (email) DO UPDATE for the whole list.
+            User.objects.bulk_create(
+                [
+                    User(
+                        email=row["email"],
+                        name=row["name"],
+                        role="faculty",
+                        pbl_user_id=row["pbl_user_id"],
+                        is_active=True,
+                    )
+                    for row in by_email.values()
+                ],
+                update_conflicts=True,
+                unique_fields=["email"],
+                update_fields=["name", "role", "pbl_user_id", "is_active", "updated_at"],
+            )
 
             deactivated = 0
             if deactivate_missing:
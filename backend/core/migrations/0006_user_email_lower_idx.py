@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-15 22:31
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_remove_user_is_available_for_booking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='core_user_email_lower_idx'),
+        ),
+    ]
@@ -4,6 +4,7 @@ Core Models - User Model for Scheduler
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 
 # Import assignment model so it's picked up by migrations
 from core.assignment_models import StudentTeacherAssignment
@@ -88,6 +89,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            # Case-insensitive email lookups (SSO teacher resolution, PBL profile matching).
+            models.Index(Lower('email'), name='core_user_email_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.email})"
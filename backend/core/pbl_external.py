@@ -1,26 +1,90 @@
 import logging
-from typing import Any, Dict, List, Optional, Union
+import threading
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 
+import ijson
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models import Exists, Q, Subquery
+from django.db.models.functions import Lower
+
+# Only imported after the app registry is ready (views, commands, lazy
+# imports), so the models can be bound once at module level.
+from core.assignment_models import StudentTeacherAssignment
+from core.models import User
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session for PBL API calls; avoids a TCP+TLS handshake per request.
+_SESSION = requests.Session()
+_SESSION.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=2,
+            read=0,  # a stalled read already used up the full read timeout
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+# Fail fast when PBL is unreachable; `timeout` arguments bound the read only.
+_CONNECT_TIMEOUT = 3.05
+
+_STUDENT_BY_EMAIL_KEY = 'pbl:student_by_email:{}'
+_STUDENTS_LOADED_KEY = 'pbl:students_by_email:loaded'
+_STUDENTS_FETCH_LOCK = threading.Lock()
+
+
+_MENTOR_LIST_KEYS = ('subjects', 'assignments', 'courses', 'modules')
+_NESTED_MENTOR_KEYS = frozenset(('mentors', 'evaluators') + _MENTOR_LIST_KEYS)
+
+# Partner field aliases, in lookup order (see _extract_mentor_emails).
+_CONTEXT_SUBJECT_KEYS = ('subject', 'subjectName', 'course', 'courseName', 'module', 'moduleName')
+_EMAIL_FIELD_ALIASES = (
+    ('mentorEmails', 'mentor_emails'),
+    ('mentorEmail', 'mentor_email'),
+    ('evaluatorEmails', 'evaluator_emails'),
+    ('evaluatorEmail', 'evaluator_email'),
+)
+_PERSON_SUBJECT_KEYS = ('subject', 'subjectName', 'name')
+_PERSON_EMAIL_KEYS = ('email', 'mentorEmail', 'mentor_email', 'evaluatorEmail', 'evaluator_email')
+_ITEM_SUBJECT_KEYS = ('subject', 'name', 'title', 'subjectName')
+_MENTOR_OBJ_EMAIL_KEYS = ('email', 'mentorEmail', 'mentor_email')
+_EVALUATOR_OBJ_EMAIL_KEYS = ('email', 'evaluatorEmail', 'evaluator_email')
+
+# Keys that make _extract_mentor_emails do more than dedupe `mentorEmails`.
+_MENTOR_EMAILS_FAST_PATH_BLOCKERS = (
+    _NESTED_MENTOR_KEYS.union(_CONTEXT_SUBJECT_KEYS, *_EMAIL_FIELD_ALIASES) - {'mentorEmails'}
+)
+
+
+def _first(d: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    """First truthy value among `keys`, like chaining `d.get(a) or d.get(b)`."""
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return v
+    return None
+
 
 def _uniq_emails(values: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
+    # First spelling wins per case-insensitive email; dicts keep insertion order.
+    by_key: Dict[str, str] = {}
     for v in values:
         email = (v or '').strip()
-        if not email:
-            continue
-        key = email.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(email)
-    return out
+        if email:
+            by_key.setdefault(email.lower(), email)
+    return list(by_key.values())
 
 
 def _extract_mentor_emails(raw_student: Dict[str, Any]) -> Dict[str, Any]:
@@ -41,33 +105,40 @@ def _extract_mentor_emails(raw_student: Dict[str, Any]) -> Dict[str, Any]:
     mentor_emails: List[str] = []
     mentor_emails_by_subject: Dict[str, List[str]] = {}
 
-    def add_email(email: Any, subject: Optional[str] = None) -> None:
-        if email is None:
-            return
-        email_s = str(email).strip()
-        if not email_s:
-            return
+    def add_clean(email_s: str, subject_s: str) -> None:
+        # Both arguments are already stripped strings.
         mentor_emails.append(email_s)
-        if subject:
-            subject_s = str(subject).strip()
-            if subject_s:
-                mentor_emails_by_subject.setdefault(subject_s, []).append(email_s)
+        if subject_s:
+            mentor_emails_by_subject.setdefault(subject_s, []).append(email_s)
 
     def add_emails(value: Any, subject: Optional[str] = None) -> None:
-        if value is None:
-            return
-        if isinstance(value, list):
-            for item in value:
-                add_email(item, subject)
-            return
-        if isinstance(value, dict):
-            # If it's a dict keyed by subject -> mentor email(s)
-            for k, v in value.items():
-                subj = str(k).strip() if k is not None else None
-                add_emails(v, subj or subject)
-            return
-        # string/other scalar
-        add_email(value, subject)
+        # Walk nested subject dicts with an explicit stack rather than
+        # recursion; entries are pushed reversed to keep payload order.
+        stack = [(value, subject)]
+        while stack:
+            value, subject = stack.pop()
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                # If it's a dict keyed by subject -> mentor email(s)
+                for k, v in reversed(value.items()):
+                    subj = str(k).strip() if k is not None else None
+                    stack.append((v, subj or subject))
+                continue
+            # Normalise the subject once for every email in this value.
+            subject_s = str(subject).strip() if subject else ''
+            if isinstance(value, list):
+                for item in value:
+                    if item is None:
+                        continue
+                    email_s = str(item).strip()
+                    if email_s:
+                        add_clean(email_s, subject_s)
+                continue
+            # string/other scalar
+            email_s = str(value).strip()
+            if email_s:
+                add_clean(email_s, subject_s)
 
     if not isinstance(raw_student, dict):
         return {'mentor_emails': [], 'mentor_emails_by_subject': {}}
@@ -76,62 +147,43 @@ def _extract_mentor_emails(raw_student: Dict[str, Any]) -> Dict[str, Any]:
     # Some partner payloads include subject and evaluatorEmail at the same level
     # (e.g. teams items: {subject: 'X', evaluatorEmail: 'a@b.com'}). In that case
     # we treat those emails as subject-scoped mappings.
-    context_subject = (
-        raw_student.get('subject')
-        or raw_student.get('subjectName')
-        or raw_student.get('course')
-        or raw_student.get('courseName')
-        or raw_student.get('module')
-        or raw_student.get('moduleName')
-    )
+    context_subject = _first(raw_student, _CONTEXT_SUBJECT_KEYS)
+
+    for aliases in _EMAIL_FIELD_ALIASES:
+        add_emails(_first(raw_student, aliases), context_subject)
 
-    add_emails(raw_student.get('mentorEmails') or raw_student.get('mentor_emails'), context_subject)
-    add_emails(raw_student.get('mentorEmail') or raw_student.get('mentor_email'), context_subject)
-    add_emails(raw_student.get('evaluatorEmails') or raw_student.get('evaluator_emails'), context_subject)
-    add_emails(raw_student.get('evaluatorEmail') or raw_student.get('evaluator_email'), context_subject)
+    # Most payloads carry only the direct fields above; skip absent nested keys.
+    nested_keys = raw_student.keys() & _NESTED_MENTOR_KEYS
 
     # 2) mentors/evaluators list
-    people = raw_student.get('mentors')
-    if not isinstance(people, list):
+    people = raw_student.get('mentors') if 'mentors' in nested_keys else None
+    if not isinstance(people, list) and 'evaluators' in nested_keys:
         people = raw_student.get('evaluators')
     if isinstance(people, list):
         for m in people:
             if not isinstance(m, dict):
                 continue
-            subject = m.get('subject') or m.get('subjectName') or m.get('name')
-            add_emails(
-                m.get('email')
-                or m.get('mentorEmail')
-                or m.get('mentor_email')
-                or m.get('evaluatorEmail')
-                or m.get('evaluator_email'),
-                subject,
-            )
+            add_emails(_first(m, _PERSON_EMAIL_KEYS), _first(m, _PERSON_SUBJECT_KEYS))
 
     # 3) subjects/assignments/courses list
-    for list_key in ('subjects', 'assignments', 'courses', 'modules'):
-        items = raw_student.get(list_key)
+    for list_key in _MENTOR_LIST_KEYS:
+        if list_key not in nested_keys:
+            continue
+        items = raw_student[list_key]
         if not isinstance(items, list):
             continue
         for item in items:
             if not isinstance(item, dict):
                 continue
-            subject = item.get('subject') or item.get('name') or item.get('title') or item.get('subjectName')
-            add_emails(item.get('mentorEmails') or item.get('mentor_emails'), subject)
-            add_emails(item.get('mentorEmail') or item.get('mentor_email'), subject)
-            add_emails(item.get('evaluatorEmails') or item.get('evaluator_emails'), subject)
-            add_emails(item.get('evaluatorEmail') or item.get('evaluator_email'), subject)
+            subject = _first(item, _ITEM_SUBJECT_KEYS)
+            for aliases in _EMAIL_FIELD_ALIASES:
+                add_emails(_first(item, aliases), subject)
             mentor_obj = item.get('mentor')
             if isinstance(mentor_obj, dict):
-                add_emails(mentor_obj.get('email') or mentor_obj.get('mentorEmail') or mentor_obj.get('mentor_email'), subject)
+                add_emails(_first(mentor_obj, _MENTOR_OBJ_EMAIL_KEYS), subject)
             evaluator_obj = item.get('evaluator')
             if isinstance(evaluator_obj, dict):
-                add_emails(
-                    evaluator_obj.get('email')
-                    or evaluator_obj.get('evaluatorEmail')
-                    or evaluator_obj.get('evaluator_email'),
-                    subject,
-                )
+                add_emails(_first(evaluator_obj, _EVALUATOR_OBJ_EMAIL_KEYS), subject)
 
     # Normalize per-subject values and flatten
     mentor_emails = _uniq_emails(mentor_emails)
@@ -147,8 +199,13 @@ def _extract_mentor_emails(raw_student: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# SSO_MODE is fixed for the life of the process (see sso_service._SSO_MODE).
+_MOCK_MODE = (getattr(settings, 'SSO_MODE', '') or '').lower() == 'mock'
+
+
 def _is_mock_mode() -> bool:
-    return (getattr(settings, 'SSO_MODE', '') or '').lower() == 'mock'
+    return _MOCK_MODE
+
 
 def _mock_student_profile(email: str) -> Dict[str, Any]:
     """Local-only mock student profile.
@@ -156,9 +213,6 @@ def _mock_student_profile(email: str) -> Dict[str, Any]:
     This enables dev/testing without a real PBL dependency.
     It derives mentor emails from local `StudentTeacherAssignment` rows.
     """
-    from core.models import User
-    from core.assignment_models import StudentTeacherAssignment
-
     email_norm = (email or '').strip().lower()
     profile: Dict[str, Any] = {
         'email': email,
@@ -169,34 +223,47 @@ def _mock_student_profile(email: str) -> Dict[str, Any]:
     if not email_norm:
         return profile
 
-    student = User.objects.filter(email__iexact=email_norm, role='student').first()
+    # Lower(email) = ... matches core_user_email_lower_idx; iexact (UPPER) would not.
+    student = (
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower=email_norm, role='student')
+        .values('pk', 'email', 'university_roll_number')
+        .first()
+    )
     if not student:
         return profile
 
-    teacher_ids = list(
-        StudentTeacherAssignment.objects.filter(student=student)
+    # Teacher identifiers are either PBL ids or plain emails; ids resolve to
+    # faculty emails, emails pass through. With no PBL ids every faculty user
+    # counts as a mentor. Both halves go out as one UNION ALL round trip.
+    assigned = (
+        StudentTeacherAssignment.objects.filter(student_id=student['pk'])
+        .exclude(teacher_external_id='')
+        .order_by()
+    )
+    pbl_assigned = assigned.exclude(teacher_external_id__contains='@').values('teacher_external_id')
+    mentors = (
+        User.objects.filter(role='faculty')
+        .filter(Q(pbl_user_id__in=Subquery(pbl_assigned)) | ~Exists(pbl_assigned))
+        .exclude(email='')
+        .order_by()
+        .values_list('email', flat=True)
+    )
+    direct = (
+        assigned.filter(teacher_external_id__contains='@')
         .values_list('teacher_external_id', flat=True)
         .distinct()
     )
 
-    teacher_identifiers = [str(t).strip() for t in teacher_ids if t and str(t).strip()]
-    direct_emails = [t for t in teacher_identifiers if '@' in t]
-    pbl_ids = [t for t in teacher_identifiers if '@' not in t]
-
-    mentors_qs = User.objects.filter(role='faculty')
-    if pbl_ids:
-        mentors_qs = mentors_qs.filter(pbl_user_id__in=pbl_ids)
-
-    mentor_emails = [u.email for u in mentors_qs if u.email]
-    mentor_emails.extend(direct_emails)
+    mentor_emails = [str(e).strip() for e in mentors.union(direct, all=True) if e and str(e).strip()]
 
     profile.update(
         {
             'mentor_emails': mentor_emails,
-            'university_roll_number': student.university_roll_number,
+            'university_roll_number': student['university_roll_number'],
             'raw': {
-                'email': student.email,
-                'universityRollNumber': student.university_roll_number,
+                'email': student['email'],
+                'universityRollNumber': student['university_roll_number'],
                 'mentorEmails': mentor_emails,
             },
         }
@@ -235,7 +302,7 @@ def _get_json(path: str, *, params: Optional[Dict[str, Any]] = None, timeout: in
         return None
 
     try:
-        resp = requests.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=timeout)
+        resp = _SESSION.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=(_CONNECT_TIMEOUT, timeout))
         if resp.status_code != 200:
             body_preview = (resp.text or '').strip().replace('\n', ' ')
             if len(body_preview) > 300:
@@ -255,7 +322,7 @@ def _get_json(path: str, *, params: Optional[Dict[str, Any]] = None, timeout: in
                     body_preview,
                 )
             return None
-        return resp.json()
+        return orjson.loads(resp.content)
     except requests.RequestException as exc:
         logger.error('PBL external API request error: %s', exc)
         return None
@@ -278,7 +345,7 @@ def _get_json_any(
         return None
 
     try:
-        resp = requests.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=timeout)
+        resp = _SESSION.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=(_CONNECT_TIMEOUT, timeout))
         if resp.status_code != 200:
             body_preview = (resp.text or '').strip().replace('\n', ' ')
             if len(body_preview) > 300:
@@ -300,7 +367,7 @@ def _get_json_any(
             return None
 
         # May be dict or list.
-        return resp.json()
+        return orjson.loads(resp.content)
     except requests.RequestException as exc:
         logger.error('PBL external API request error: %s', exc)
         return None
@@ -315,8 +382,14 @@ def _get_json_any_at_base(
     *,
     params: Optional[Dict[str, Any]] = None,
     timeout: int = 10,
+    status: Optional[Dict[str, int]] = None,
 ) -> Optional[Union[Dict[str, Any], List[Any]]]:
-    """Fetch JSON from an explicit base URL (supports dict/list responses)."""
+    """Fetch JSON from an explicit base URL (supports dict/list responses).
+
+    When given, `status['status_code']` records the HTTP status of a
+    response that arrived (and, for 200, parsed); it stays unset on
+    transport and parse errors.
+    """
 
     base = (base_url or '').rstrip('/')
     if not base or not getattr(settings, 'PBL_API_KEY', None):
@@ -324,8 +397,10 @@ def _get_json_any_at_base(
         return None
 
     try:
-        resp = requests.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=timeout)
+        resp = _SESSION.get(f"{base}{path}", headers=_headers(), params=params or {}, timeout=(_CONNECT_TIMEOUT, timeout))
         if resp.status_code != 200:
+            if status is not None:
+                status['status_code'] = resp.status_code
             body_preview = (resp.text or '').strip().replace('\n', ' ')
             if len(body_preview) > 300:
                 body_preview = f"{body_preview[:300]}..."
@@ -345,7 +420,10 @@ def _get_json_any_at_base(
                 )
             return None
 
-        return resp.json()
+        data = orjson.loads(resp.content)
+        if status is not None:
+            status['status_code'] = 200
+        return data
     except requests.RequestException as exc:
         logger.error('PBL external API request error: %s', exc)
         return None
@@ -354,6 +432,68 @@ def _get_json_any_at_base(
         return None
 
 
+def _get_json_stream(
+    path: str,
+    prefix: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: int = 10,
+    status: Optional[Dict[str, bool]] = None,
+) -> Iterator[Any]:
+    """Yield the items at `prefix` (ijson syntax) without buffering the body.
+
+    For large list endpoints; errors are logged and end the stream early.
+    `status['complete']` is set only when the whole body was read, so
+    callers can tell a full result from a truncated one.
+    """
+
+    base = _base_url()
+    if not base or not getattr(settings, 'PBL_API_KEY', None):
+        logger.error('PBL_API_URL / PBL_API_KEY not configured')
+        return
+
+    try:
+        with _SESSION.get(
+            f"{base}{path}", headers=_headers(), params=params or {}, timeout=(_CONNECT_TIMEOUT, timeout), stream=True
+        ) as resp:
+            if resp.status_code != 200:
+                body_preview = (resp.text or '').strip().replace('\n', ' ')
+                if len(body_preview) > 300:
+                    body_preview = f"{body_preview[:300]}..."
+                if resp.status_code in (401, 403):
+                    logger.error(
+                        'PBL external API unauthorized: %s %s. Body: %s',
+                        resp.status_code,
+                        path,
+                        body_preview,
+                    )
+                else:
+                    logger.warning(
+                        'PBL external API request failed: %s %s. Body: %s',
+                        resp.status_code,
+                        path,
+                        body_preview,
+                    )
+                return
+
+            # Let urllib3 undo any gzip/deflate before ijson sees the bytes.
+            resp.raw.decode_content = True
+            yield from ijson.items(resp.raw, prefix, use_float=True)
+        if status is not None:
+            status['complete'] = True
+    except requests.RequestException as exc:
+        logger.error('PBL external API request error: %s', exc)
+    except Urllib3HTTPError as exc:
+        # Reading resp.raw directly skips requests' exception wrapping, so
+        # read timeouts and truncated bodies surface as urllib3 errors.
+        logger.error('PBL external API stream error: %s', exc)
+    except ijson.JSONError as exc:
+        logger.error('PBL external API JSON parse error: %s', exc)
+
+
+_TEAMS_MISS = '__MISS__'
+
+
 def get_student_teams(email: str) -> Optional[Dict[str, Any]]:
     """Fetch subject-wise mapping for a student from the PBL teams endpoint."""
 
@@ -368,9 +508,23 @@ def get_student_teams(email: str) -> Optional[Dict[str, Any]]:
     if not email_norm:
         return None
 
+    # Cache hits and misses briefly so students without a team don't re-hit /teams.
+    cache_key = f"pbl:teams:{email_norm.lower()}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return None if cached == _TEAMS_MISS else cached
+
     path = _teams_path()
-    payload = _get_json_any_at_base(base, path, params={'email': email_norm})
-    return payload if isinstance(payload, dict) else {'teams': payload} if isinstance(payload, list) else None
+    status: Dict[str, int] = {}
+    payload = _get_json_any_at_base(base, path, params={'email': email_norm}, status=status)
+    result = payload if isinstance(payload, dict) else {'teams': payload} if isinstance(payload, list) else None
+    if result is not None:
+        cache.set(cache_key, result, 120)
+    elif status.get('status_code') in (200, 404):
+        # Only a real "no team" answer is remembered; transport errors, 5xx
+        # and unparsable bodies are retried on the next call.
+        cache.set(cache_key, _TEAMS_MISS, 120)
+    return result
 
 
 def _safe_summary(obj: Any, *, max_list: int = 5) -> Dict[str, Any]:
@@ -727,47 +881,123 @@ def pbl_probe_endpoint(
 
 def get_students() -> List[Dict[str, Any]]:
     if _is_mock_mode():
-        from core.models import User
-        from core.assignment_models import StudentTeacherAssignment
+        # Three queries total: assignments, faculty, students.
+        teachers_by_student: Dict[Any, List[str]] = {}
+        for student_id, teacher_id in (
+            StudentTeacherAssignment.objects
+            .order_by()
+            .values_list('student_id', 'teacher_external_id')
+            .distinct()
+        ):
+            t = str(teacher_id).strip() if teacher_id else ''
+            if t:
+                teachers_by_student.setdefault(student_id, []).append(t)
+
+        all_pbl_ids = {t for ts in teachers_by_student.values() for t in ts if '@' not in t}
+        faculty_emails_by_pbl_id: Dict[str, List[str]] = {}
+        if all_pbl_ids:
+            for pbl_id, f_email in (
+                User.objects.filter(role='faculty', pbl_user_id__in=all_pbl_ids)
+                .values_list('pbl_user_id', 'email')
+            ):
+                faculty_emails_by_pbl_id.setdefault(pbl_id, []).append(f_email)
 
         students: List[Dict[str, Any]] = []
-        for s in User.objects.filter(role='student'):
-            teacher_ids = list(
-                StudentTeacherAssignment.objects.filter(student=s)
-                .values_list('teacher_external_id', flat=True)
-                .distinct()
-            )
-
-            teacher_identifiers = [str(t).strip() for t in teacher_ids if t and str(t).strip()]
+        # Stream the roster; on Postgres iterator() uses a server-side cursor.
+        student_rows = (
+            User.objects.filter(role='student')
+            .values_list('id', 'email', 'name', 'pbl_user_id', 'university_roll_number')
+            .iterator(chunk_size=500)
+        )
+        for s_id, s_email, s_name, s_pbl_id, s_roll in student_rows:
+            teacher_identifiers = teachers_by_student.get(s_id, [])
             direct_emails = [t for t in teacher_identifiers if '@' in t]
-            pbl_ids = [t for t in teacher_identifiers if '@' not in t]
+            pbl_ids = dict.fromkeys(t for t in teacher_identifiers if '@' not in t)
 
-            mentor_emails = list(
-                User.objects.filter(role='faculty', pbl_user_id__in=pbl_ids)
-                .values_list('email', flat=True)
-            ) if pbl_ids else []
+            mentor_emails = [
+                f_email
+                for pbl_id in pbl_ids
+                for f_email in faculty_emails_by_pbl_id.get(pbl_id, [])
+            ]
 
             mentor_emails.extend(direct_emails)
             students.append(
                 {
-                    'email': s.email,
-                    'name': s.name,
-                    'id': s.pbl_user_id,
-                    'universityRollNumber': s.university_roll_number,
+                    'email': s_email,
+                    'name': s_name,
+                    'id': s_pbl_id,
+                    'universityRollNumber': s_roll,
                     'mentorEmails': mentor_emails,
                 }
             )
         return students
 
-    data = _get_json('/students') or {}
-    students = data.get('students')
-    return students if isinstance(students, list) else []
+    status: Dict[str, bool] = {}
+    students = list(iter_students(status))
+    # A truncated roster is treated like a failed fetch.
+    return students if status.get('complete') else []
 
 
-def get_faculty() -> List[Dict[str, Any]]:
+def iter_students(status: Optional[Dict[str, bool]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield students one by one; the real /students body is parsed as a stream.
+
+    See `_get_json_stream` for `status`.
+    """
     if _is_mock_mode():
-        from core.models import User
+        yield from get_students()
+        if status is not None:
+            status['complete'] = True
+        return
+
+    yield from _get_json_stream('/students', 'students.item', status=status)
+
+
+def get_student_by_email(email_norm: str) -> Optional[Dict[str, Any]]:
+    """Return the /students record for a lowercased email, or None.
+
+    The roster is cached as one entry per email plus a marker saying it was
+    fully loaded, so a lookup reads a single small key instead of the whole
+    roster.
+    """
+    if not email_norm:
+        return None
+
+    key = _STUDENT_BY_EMAIL_KEY.format(email_norm)
+    cached = cache.get(key)
+    if isinstance(cached, dict):
+        return cached
+    if cache.get(_STUDENTS_LOADED_KEY):
+        return None
+
+    # Concurrent misses in this process wait for one roster download
+    # instead of each starting their own.
+    with _STUDENTS_FETCH_LOCK:
+        if cache.get(_STUDENTS_LOADED_KEY):
+            cached = cache.get(key)
+            return cached if isinstance(cached, dict) else None
+
+        status: Dict[str, bool] = {}
+        index: Dict[str, Dict[str, Any]] = {}
+        for s in iter_students(status):
+            if not isinstance(s, dict):
+                continue
+            s_email = (s.get('email') or '').strip().lower()
+            # Keep the first record per email, matching the old linear scan.
+            if s_email and s_email not in index:
+                index[s_email] = s
+
+        # Don't pin an empty or partial roster (PBL unreachable, stream cut
+        # short) for the whole TTL; this caller still gets what was read.
+        if index and status.get('complete'):
+            # Marker first so it never outlives the entries it vouches for.
+            entries: Dict[str, Any] = {_STUDENTS_LOADED_KEY: True}
+            entries.update((_STUDENT_BY_EMAIL_KEY.format(e), rec) for e, rec in index.items())
+            cache.set_many(entries, 60)
+        return index.get(email_norm)
 
+
+def get_faculty() -> List[Dict[str, Any]]:
+    if _is_mock_mode():
         return [
             {
                 'email': f.email,
@@ -782,6 +1012,11 @@ def get_faculty() -> List[Dict[str, Any]]:
     return faculty if isinstance(faculty, list) else []
 
 
+def invalidate_student_profile(email: str) -> None:
+    """Drop the cached external profile for `email` after its assignments change."""
+    cache.delete(f"pbl:student_profile:{(email or '').strip().lower()}")
+
+
 def get_student_external_profile(email: str) -> Dict[str, Any]:
     """Return mentor emails for the given student email.
 
@@ -860,15 +1095,7 @@ def get_student_external_profile(email: str) -> Dict[str, Any]:
             cache.set(cache_key, profile, 300)
             return profile
 
-    students = get_students()
-    match = None
-    for s in students:
-        if not isinstance(s, dict):
-            continue
-        s_email = (s.get('email') or '').strip().lower()
-        if s_email == email_norm:
-            match = s
-            break
+    match = get_student_by_email(email_norm)
 
     if not match:
         cache.set(cache_key, profile, 60)
@@ -878,7 +1105,17 @@ def get_student_external_profile(email: str) -> Dict[str, Any]:
 
     mentor_emails = match.get('mentorEmails') or match.get('mentor_emails') or []
 
-    extracted = _extract_mentor_emails(match)
+    direct_emails = match.get('mentorEmails')
+    if (
+        isinstance(direct_emails, list)
+        and direct_emails
+        and all(isinstance(x, str) for x in direct_emails)
+        and match.keys().isdisjoint(_MENTOR_EMAILS_FAST_PATH_BLOCKERS)
+    ):
+        # Common partner shape: a flat email list and nothing else to walk.
+        extracted = {'mentor_emails': _uniq_emails(direct_emails), 'mentor_emails_by_subject': {}}
+    else:
+        extracted = _extract_mentor_emails(match)
     extracted_list = extracted.get('mentor_emails')
     if isinstance(extracted_list, list) and extracted_list:
         mentor_emails = extracted_list
@@ -909,3 +1146,42 @@ def get_student_external_profile(email: str) -> Dict[str, Any]:
     # Token validity is ~5 minutes; profile changes are infrequent. Cache briefly.
     cache.set(cache_key, profile, 300)
     return profile
+
+
+def get_student_external_profile_for_request(request: Any, email: str) -> Dict[str, Any]:
+    """Request-scoped memo around `get_student_external_profile`.
+
+    Keeps the profile on the request so repeated lookups in one request
+    (serializer validation, get_queryset/get_object) skip the cache round-trip.
+    """
+    memo = getattr(request, '_pbl_profile_cache', None)
+    if memo is None:
+        memo = {}
+        request._pbl_profile_cache = memo
+
+    email_norm = (email or '').strip().lower()
+    profile = memo.get(email_norm)
+    if profile is None:
+        profile = get_student_external_profile(email)
+        memo[email_norm] = profile
+    return profile
+
+
+def get_student_mentor_emails_for_request(request: Any, email: str) -> FrozenSet[str]:
+    """Lowercased mentor emails from the request-scoped profile, for membership checks."""
+    memo = getattr(request, '_pbl_mentor_emails_cache', None)
+    if memo is None:
+        memo = {}
+        request._pbl_mentor_emails_cache = memo
+
+    email_norm = (email or '').strip().lower()
+    mentor_emails = memo.get(email_norm)
+    if mentor_emails is None:
+        profile = get_student_external_profile_for_request(request, email)
+        mentor_emails = frozenset(
+            str(e).strip().lower()
+            for e in (profile.get('mentor_emails') or [])
+            if e is not None and str(e).strip()
+        )
+        memo[email_norm] = mentor_emails
+    return mentor_emails
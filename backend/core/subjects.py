@@ -9,6 +9,8 @@ This module intentionally avoids DB schema changes.
 
 from __future__ import annotations
 
+from functools import lru_cache
+
 ALLOWED_SUBJECTS = {
     "Web Development",
     "Compiler Design",
@@ -35,6 +37,11 @@ def _norm_key(value: str) -> str:
     return " ".join((value or "").strip().split()).lower()
 
 
+# Precomputed once; normalize_subject is on every booking/slot hot path.
+_CANONICAL_BY_KEY = {_norm_key(subj): subj for subj in ALLOWED_SUBJECTS}
+
+
+@lru_cache(maxsize=256)
 def normalize_subject(value: str) -> str:
     raw = (value or "").strip()
     if not raw:
@@ -43,9 +50,9 @@ def normalize_subject(value: str) -> str:
     key = _norm_key(raw)
 
     # Canonical match (case-insensitive)
-    for subj in ALLOWED_SUBJECTS:
-        if _norm_key(subj) == key:
-            return subj
+    canonical = _CANONICAL_BY_KEY.get(key)
+    if canonical:
+        return canonical
 
     # Alias match
     mapped = _SUBJECT_ALIASES.get(key)
@@ -226,6 +226,12 @@ PBL_API_URL = env('PBL_API_URL', default='')
 # Do not hardcode; must come from .env or process environment
 PBL_API_KEY = env('PBL_API_KEY', default=os.environ.get('PBL_API_KEY', ''))
 
+# Cache successful PBL SSO verifications (keyed by a hash of the token, never the raw token).
+SSO_VERIFY_CACHE_ENABLED = env.bool('SSO_VERIFY_CACHE_ENABLED', default=True)
+SSO_VERIFY_CACHE_TTL = int(env('SSO_VERIFY_CACHE_TTL', default=300))
+# Short negative cache for tokens PBL rejected (400/401/403 or valid=false).
+SSO_VERIFY_NEG_TTL = int(env('SSO_VERIFY_NEG_TTL', default=30))
+
 # Some deployments expose subject->mentor mapping via a separate endpoint (e.g. the PBL web app).
 # Example: https://pbl-form.vercel.app/api/external/teams?email=<student>
 PBL_TEAMS_API_URL = env('PBL_TEAMS_API_URL', default='')
@@ -251,6 +257,10 @@ FACULTY_FRONTEND_URL = env('FACULTY_FRONTEND_URL', default='http://localhost:517
 # Business Rules Configuration
 CANCELLATION_WINDOW_HOURS = int(env('CANCELLATION_WINDOW_HOURS', default=24))
 
+# Nightly 19:00 reset_scheduling_data job started from CoreConfig.ready().
+# Disable when the reset runs from an external cron instead.
+SCHEDULING_RESET_JOB_ENABLED = env.bool('SCHEDULING_RESET_JOB_ENABLED', default=True)
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -12,6 +12,7 @@ from django.db import transaction
 from django.db.models import Count
 from django.db.models import Min
 from django.db.models import Q
+from django.db.models.functions import Lower
 import os
 from datetime import datetime, timedelta
 
@@ -163,7 +164,12 @@ class StudentSubjectAvailabilityView(APIView):
 
         # Fallback: local assignments
         if not mentor_emails_by_subject:
-            student = User.objects.filter(email__iexact=email, role=User.Role.STUDENT).first()
+            student = (
+                User.objects.annotate(email_lower=Lower('email'))
+                .filter(email_lower=email.lower(), role=User.Role.STUDENT)
+                .only('pk')
+                .first()
+            )
             if student is not None:
                 rows = list(
                     StudentTeacherAssignment.objects.filter(student=student)
@@ -267,7 +273,7 @@ class FacultySlotViewSet(viewsets.ModelViewSet):
         """Return only the faculty's own slots."""
         return Slot.objects.filter(
             faculty=self.request.user
-        ).select_related('faculty').prefetch_related('booking')
+        ).select_related('faculty', 'booking__student')
     
     def list(self, request):
         """List faculty's slots with optional filters."""
@@ -587,11 +593,11 @@ class StudentSlotViewSet(viewsets.ReadOnlyModelViewSet):
         """
         from core.assignment_models import StudentTeacherAssignment
         from core.models import User
-        from core.pbl_external import get_student_external_profile
+        from core.pbl_external import get_student_external_profile_for_request
         
         student = self.request.user
 
-        profile = get_student_external_profile(student.email) or {}
+        profile = get_student_external_profile_for_request(self.request, student.email) or {}
         pbl_by_subject = profile.get('mentor_emails_by_subject') or {}
 
         mentor_emails_by_subject: dict[str, list[str]] = {}
@@ -675,7 +681,7 @@ class StudentSlotViewSet(viewsets.ReadOnlyModelViewSet):
             visibility_q,
             is_available=True,
             start_time__gt=timezone.now(),
-        ).select_related('faculty')
+        ).select_related('faculty', 'booking')
         
         # Exclude slots that are already booked
         queryset = queryset.exclude(